@@ -1,6 +1,7 @@
 # app/core/config.py
 # 환경변수 / 비밀키 로드 설정 (pydantic-settings 기반)
 
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 
@@ -12,6 +13,12 @@ class Settings(BaseSettings):
     pg_dsn_async: str # youth_policy
     pg_dsn_async_fin: str # finproduct
 
+    # 커넥션 풀 (엔진별)
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30     # 초
+    db_pool_recycle: int = 60     # 초 (PgBouncer server_idle_timeout보다 짧게)
+
     # CORS 허용 도메인
     cors_origins: List[str] = []
 
@@ -21,8 +28,11 @@ class Settings(BaseSettings):
         env_file=".env",
         env_prefix="",           # .env 키 그대로 사용
         case_sensitive=False,    # 대소문자 무시
-        extra="ignore"           # Settings에 없는 키는 무시
+        extra="ignore",          # Settings에 없는 키는 무시
+        frozen=True,             # 로드 후 변경 불가 (get_settings() 캐시 인스턴스를 공유하므로)
     )
 
-# 인스턴스 생성
-settings = Settings()
\ No newline at end of file
+# 인스턴스 생성 (프로세스당 1회만 .env 파싱 + 검증)
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
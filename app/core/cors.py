@@ -1,8 +1,8 @@
 from fastapi.middleware.cors import CORSMiddleware
-from .config import settings
+from .config import get_settings
 
 def setup_cors(app):
-    origins = settings.cors_origins or ["*"]
+    origins = get_settings().cors_origins or ["*"]
     app.add_middleware(
         CORSMiddleware,
         allow_origins=origins,
@@ -2,39 +2,107 @@
 # SQLAlchemy Async 엔진/세션 팩토리
 
 import os
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from contextvars import ContextVar
+from typing import AsyncGenerator, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.pool import NullPool
-from .config import settings
+from .config import get_settings
 
 class Base(DeclarativeBase):
     pass
 
 # 테스트 실행 여부를 감지해 asyncpg 이벤트 루프 충돌을 방지
-_is_test_env = settings.app_env.lower() == "test" or os.getenv("PYTEST_CURRENT_TEST") is not None
+_is_test_env = get_settings().app_env.lower() == "test" or os.getenv("PYTEST_CURRENT_TEST") is not None
 
-# Policy DB
-engine_kwargs = {"pool_pre_ping": True}
-if _is_test_env:
-    engine_kwargs["poolclass"] = NullPool
+# 운영: checkout마다 SELECT 1을 보내는 pre_ping 대신 pool_recycle로 오래된 커넥션을 교체
+#       풀 크기는 DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT / DB_POOL_RECYCLE로 조정
+# 테스트: NullPool + pre_ping 유지
+def _engine_kwargs() -> dict:
+    if _is_test_env:
+        return {"pool_pre_ping": True, "poolclass": NullPool}
+    settings = get_settings()
+    return {
+        "pool_pre_ping": False,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        # pre_ping 없이도 네트워크 단절을 빨리 감지하도록 TCP keepalive 설정
+        "connect_args": {"server_settings": {"tcp_keepalives_idle": "30"}},
+    }
+
+def _discard_closed_on_checkout(async_engine: AsyncEngine) -> None:
+    """
+    checkout 시 서버가 이미 끊은 커넥션(asyncpg is_closed)은 무효화하고
+    풀이 새 커넥션으로 재시도하도록 함 (네트워크 왕복 없음)
+    """
+    @event.listens_for(async_engine.sync_engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        if dbapi_connection.driver_connection.is_closed():
+            raise DisconnectionError()
+
+# 요청 단위 세션 보관소 (DBSessionMiddleware가 요청마다 설정)
+_request_sessions: ContextVar[Optional[Dict[async_sessionmaker, AsyncSession]]] = ContextVar(
+    "_request_sessions", default=None
+)
+
+class DBSessionMiddleware:
+    """요청마다 세션 보관소를 만들고, 응답이 끝나면 그 요청에서 연 세션을 한 번에 닫는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sessions: Dict[async_sessionmaker, AsyncSession] = {}
+        token = _request_sessions.set(sessions)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_sessions.reset(token)
+            for session in sessions.values():
+                await session.close()
 
-engine = create_async_engine(settings.pg_dsn_async, **engine_kwargs)
+def setup_db_session(app) -> None:
+    app.add_middleware(DBSessionMiddleware)
+
+async def _get_session(factory: async_sessionmaker) -> AsyncGenerator[AsyncSession, None]:
+    sessions = _request_sessions.get()
+    if sessions is None:
+        # 미들웨어 밖(스크립트 등)에서는 기존처럼 호출마다 세션 생성/종료
+        async with factory() as session:
+            yield session
+        return
+
+    # 같은 요청 안에서는 세션을 재사용 (종료는 미들웨어 담당)
+    session = sessions.get(factory)
+    if session is None:
+        session = sessions[factory] = factory()
+    yield session
+
+# Policy DB
+engine = create_async_engine(get_settings().pg_dsn_async, **_engine_kwargs())
 SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
+    async for session in _get_session(SessionLocal):
         yield session
 
 
 # FinProduct DB
-fin_engine_kwargs = {"pool_pre_ping": True}
-if _is_test_env:
-    fin_engine_kwargs["poolclass"] = NullPool
-
-fin_engine = create_async_engine(settings.pg_dsn_async_fin, **fin_engine_kwargs)
+fin_engine = create_async_engine(get_settings().pg_dsn_async_fin, **_engine_kwargs())
 FinSessionLocal = async_sessionmaker(fin_engine, class_=AsyncSession, expire_on_commit=False)
     
 async def get_fin_db() -> AsyncGenerator[AsyncSession, None]:
-    async with FinSessionLocal() as session:
+    async for session in _get_session(FinSessionLocal):
         yield session
+
+if not _is_test_env:
+    _discard_closed_on_checkout(engine)
+    _discard_closed_on_checkout(fin_engine)
@@ -1,31 +1,39 @@
 # raw_ingest.py
 from __future__ import annotations
-from typing import Any, Dict
-import time
-import json
+from typing import Any, Dict, List
 import os
+import asyncio
 import logging
+import logging.handlers
+import queue
+import random
+import time
 
 from dotenv import load_dotenv
+import orjson
+from psycopg.types.json import Jsonb, set_json_dumps
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
-from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
 import httpx
 
 # -------------------------
 # 환경 변수
 # -------------------------
-load_dotenv()
+# run_all_finproduct_elt.py가 이미 .env를 로드했다면(ENV_LOADED=1) 재파싱 생략
+if not os.environ.get("ENV_LOADED"):
+    load_dotenv()
+
+_ENV = dict(os.environ)   # 1회 스냅샷
 
 def env_str(name: str, default: str | None = None) -> str:
-    v = os.getenv(name, default)
+    v = _ENV.get(name, default)
     if v is None:
         raise RuntimeError(f"Missing environment variable: {name}")
     return v
 
 def env_int(name: str, default: int) -> int:
-    v = os.getenv(name)
+    v = _ENV.get(name)
     return int(v) if v not in (None, "") else default
 
 PG_DSN_FIN           = env_str("PG_DSN_FIN")
@@ -37,22 +45,45 @@ START_PAGE   = env_int("START_PAGE", 1)
 END_PAGE     = env_int("END_PAGE", 0)         # 0이면 끝까지
 HTTP_TIMEOUT = env_int("HTTP_TIMEOUT", 10)
 RETRY_MAX    = env_int("RETRY_MAX", 5)
+RAW_BATCH_SIZE = max(1, env_int("RAW_BATCH_SIZE", 50))  # N 페이지마다 한 번에 INSERT + COMMIT
+FETCH_CONCURRENCY = max(1, env_int("FETCH_CONCURRENCY", 8))  # 전체(모든 combo 합산) 동시 페이지 요청 수
+REQUEST_INTERVAL_MS = env_int("REQUEST_INTERVAL_MS", 200)     # 요청 시작 간 최소 간격 (전체 공통, 재시도 포함)
+DB_POOL_SIZE = env_int("ELT_DB_POOL_SIZE", 4)   # combo 수만큼이면 충분 (동시 COPY 수 = combo 수)
 LOG_LEVEL    = env_str("LOG_LEVEL", "INFO")
+LOG_EVERY    = max(1, env_int("LOG_EVERY", 25))     # INFO 진행 로그는 N 페이지마다 한 번
 
 # -------------------------
 # 로깅
 # -------------------------
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="%(asctime)s %(name)s %(levelname)s :: %(message)s"
-)
 log = logging.getLogger("raw_ingest")
 
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    포맷팅/스트림 쓰기는 QueueListener 백그라운드 스레드에서 처리하고,
+    수집 루프에서는 QueueHandler로 레코드를 큐에 넣기만 합니다.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s :: %(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
 # -------------------------
 # DB 연결
 # -------------------------
+# psycopg JSON 어댑터를 orjson으로 교체 (dict → bytes 직렬화, str 변환/재인코딩 없음)
+set_json_dumps(orjson.dumps)
+
 def get_engine() -> Engine:
-    return create_engine(PG_DSN_FIN, future=True)
+    # 단발성 배치 프로세스: 동시에 쓰는 커넥션은 combo 수만큼뿐이므로 overflow 없이 고정 크기로 제한
+    # (API 서버의 풀과 같은 DB의 max_connections를 나눠 쓰므로 불필요한 백엔드를 만들지 않음)
+    return create_engine(PG_DSN_FIN, future=True, pool_size=DB_POOL_SIZE, max_overflow=0)
 
 def test_connection(engine: Engine) -> None:
     try:
@@ -63,36 +94,40 @@ def test_connection(engine: Engine) -> None:
         log.error("Database connection failed", exc_info=e)
         raise
 
-engine = get_engine()
-test_connection(engine)
-
 # -------------------------
 # HTTP 호출
 # -------------------------
 class ApiError(Exception):
     pass
 
-@retry(
-    stop=stop_after_attempt(RETRY_MAX),
-    wait=wait_exponential_jitter(initial=0.5, max=5),
-    retry=retry_if_exception_type((httpx.HTTPError, ApiError)),
-)
-def fetch_page(
-    client: httpx.Client,
+class Pacer:
+    """모든 combo의 요청(재시도 포함) 시작 간격을 interval 이상으로 유지 (API 호출 한도 보호)"""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+async def _fetch_page_once(
+    client: httpx.AsyncClient,
     base_url: str,
-    top_fin_grp_no: str | int,
+    params_template: Dict[str, Any],
     page_no: int | str
 ) -> Dict[str, Any]:
-    params = {
-        "auth": API_KEY,
-        "topFinGrpNo": top_fin_grp_no,
-        "pageNo": page_no,
-    }
-    resp = client.get(str(base_url), params=params, timeout=HTTP_TIMEOUT)
+    # params_template: combo마다 고정인 {"auth", "topFinGrpNo"} (pageNo만 페이지마다 변경)
+    params = {**params_template, "pageNo": page_no}
+    resp = await client.get(base_url, params=params, timeout=HTTP_TIMEOUT)
     resp.raise_for_status()
 
     try:
-        js = resp.json()
+        js = orjson.loads(resp.content)
     except Exception as e:
         raise ApiError(f"Invalid JSON response (page={page_no})") from e
 
@@ -108,18 +143,66 @@ def fetch_page(
         "params": params,
     }
 
-def extract_paging_meta(payload: Dict[str, Any]) -> tuple[int, int, int]:
+async def fetch_page(
+    client: httpx.AsyncClient,
+    pacer: Pacer,
+    base_url: str,
+    params_template: Dict[str, Any],
+    page_no: int | str
+) -> Dict[str, Any]:
+    # 최대 RETRY_MAX회 시도, 실패 시 지수 백오프(0.5s → 최대 5s) + 지터 후 재시도
+    for attempt in range(RETRY_MAX):
+        try:
+            await pacer.wait()
+            return await _fetch_page_once(client, base_url, params_template, page_no)
+        except (httpx.HTTPError, ApiError) as e:
+            if attempt + 1 >= RETRY_MAX:
+                raise
+            delay = min(5.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+            log.warning("Retrying page %s in %.2fs (attempt %s/%s): %r", page_no, delay, attempt + 1, RETRY_MAX, e)
+            await asyncio.sleep(delay)
+    raise ApiError(f"RETRY_MAX must be >= 1 (page={page_no})")
+
+def is_empty_page(payload: Dict[str, Any]) -> bool:
     result = payload.get("result", payload)
-    page_no     = int(result.get("now_page_no", 0) or START_PAGE)
-    max_page_no = int(result.get("max_page_no", 0))
-    total_count = int(result.get("total_count", 0))
-    return page_no, max_page_no, total_count
+    items = result.get("baseList", result.get("optionList", []))
+    return isinstance(items, list) and len(items) == 0
+
+# -------------------------
+# RAW 저장
+# -------------------------
+COPY_SQL = """
+COPY raw.finproduct_pages
+  (product_type, now_page_no, max_page_no, base_url, query_params, http_status, payload)
+FROM STDIN
+"""
+
+def insert_pages(engine: Engine, rows: List[tuple]) -> int:
+    """
+    RAW 페이지 행들을 COPY ... FROM STDIN으로 저장 (RAW_BATCH_SIZE 단위 COMMIT).
+    - INSERT의 행별 parse/bind 없이 페이지 JSON을 스트림으로 바로 적재합니다.
+    - 동기 함수이므로 이벤트 루프에서는 asyncio.to_thread로 호출합니다.
+    """
+    raw_conn = engine.raw_connection()   # psycopg(v3) 커넥션 (cursor.copy 사용)
+    try:
+        with raw_conn.cursor() as cur:
+            for i in range(0, len(rows), RAW_BATCH_SIZE):
+                with cur.copy(COPY_SQL) as cp:
+                    for row in rows[i:i + RAW_BATCH_SIZE]:
+                        cp.write_row(row)
+                raw_conn.commit()
+    finally:
+        raw_conn.close()
+    return len(rows)
 
 # -------------------------
 # 메인 루프
 # -------------------------
-def ingest_one(
+async def ingest_one(
     engine: Engine,
+    client: httpx.AsyncClient,
+    sem: asyncio.Semaphore,
+    pacer: Pacer,
     product_type: str,      # 'DEPOSIT' | 'SAVING'
     base_url: str,
     top_fin_grp_no: str,
@@ -127,70 +210,100 @@ def ingest_one(
 ) -> int:
     """
     base_url × top_fin_grp_no 조합 한 번을 수집.
+    - 첫 페이지로 max_page_no를 확인한 뒤 나머지 페이지는 asyncio.gather로 동시에 요청합니다.
+      (동시 요청 수 FETCH_CONCURRENCY와 요청 간격 REQUEST_INTERVAL_MS는 모든 combo가 공유)
+    - 페이징 메타가 없으면 items가 빌 때까지 순차 요청합니다.
     """
-    log.info("Starting raw ingest [%s] → %s", label or f"{top_fin_grp_no}", base_url)
-    inserted_rows = 0
+    tag = label or str(top_fin_grp_no)
+    # 로그 메서드를 지역 이름으로 바인딩 (페이지 루프에서 전역/속성 조회 생략)
+    _info, _debug = log.info, log.debug
+    _info("Starting raw ingest [%s] → %s", tag, base_url)
 
-    with httpx.Client() as client, engine.connect() as conn:
-        page = max(1, START_PAGE)
-        last_page_seen = 0
-
-        while True:
-            response = fetch_page(client, base_url, top_fin_grp_no, page)
-            status  = response["http_status"]
-            payload = response["json"]
-            params  = response["params"]
-
-            # 페이징 메타 파싱
-            now_page_no, max_page_no, total_count = extract_paging_meta(payload)
-            if last_page_seen == 0 and max_page_no:
-                last_page_seen = max_page_no
-                log.info("[%s] Paging detected: max_page_no=%s", label or top_fin_grp_no, last_page_seen)
-
-            # RAW 저장 (product_type 포함)
-            sql = text("""
-                INSERT INTO raw.finproduct_pages
-                (product_type, now_page_no, max_page_no, base_url, query_params, http_status, payload)
-                VALUES
-                (:product_type, :now_page_no, :max_page_no, :base_url, :query_params, :http_status, :payload)
-            """)
-            conn.execute(sql, {
-                "product_type": product_type,
-                "now_page_no": int(page),
-                "max_page_no": int(max_page_no) if max_page_no else None,
-                "base_url": str(base_url),
-                "query_params": json.dumps(params),
-                "http_status": int(status),
-                "payload": json.dumps(payload),
-            })
-            conn.commit()
-            inserted_rows += 1
-            log.info("[%s] Inserted RAW page: now_page_no=%s status=%s", label or top_fin_grp_no, now_page_no or page, status)
-
-            # 종료 조건
-            if END_PAGE and page >= END_PAGE:
-                log.info("[%s] END_PAGE reached: %s", label or top_fin_grp_no, END_PAGE)
-                break
+    # combo 안에서 변하지 않는 값은 페이지 루프 밖에서 한 번만 준비
+    base_url_str = str(base_url)
+    params_template = {"auth": API_KEY, "topFinGrpNo": top_fin_grp_no}
 
-            if last_page_seen and page >= last_page_seen:
-                log.info("[%s] Reached last page: %s", label or top_fin_grp_no, last_page_seen)
-                break
+    debug = log.isEnabledFor(logging.DEBUG)
+    fetched = 0
 
-            # 메타 없으면 items 비어있는지로 종료
-            result = payload.get("result", payload)
-            items = result.get("baseList", result.get("optionList", []))
-            if isinstance(items, list) and len(items) == 0 and not max_page_no:
-                log.info("[%s] Empty items; stopping at page=%s", label or top_fin_grp_no, page)
-                break
+    async def fetch(page: int) -> tuple[int, Dict[str, Any]]:
+        nonlocal fetched
+        async with sem:
+            response = await fetch_page(client, pacer, base_url_str, params_template, page)
+        fetched += 1
+        # 페이지별 로그는 DEBUG에서만, INFO는 LOG_EVERY 페이지마다 진행 상황만
+        if debug:
+            _debug("[%s] Fetched RAW page: page=%s status=%s", tag, page, response["http_status"])
+        elif fetched % LOG_EVERY == 0:
+            _info("[%s] Fetched %s pages", tag, fetched)
+        return page, response
+
+    first_page = max(1, START_PAGE)
+    first = await fetch(first_page)
+
+    # 페이징 메타 파싱 (첫 페이지의 max_page_no만 필요)
+    first_payload = first[1]["json"]
+    result = first_payload.get("result") or first_payload
+    max_page_no_raw = result.get("max_page_no")
+    max_page_no = int(max_page_no_raw) if max_page_no_raw else 0
+    max_page_no_col = max_page_no or None
+
+    # RAW 저장: RAW_BATCH_SIZE 페이지가 모일 때마다 바로 COPY + COMMIT
+    # (중간 페이지가 재시도 후에도 실패해도 그 전까지 받은 페이지는 이미 저장됨)
+    pending: List[tuple[int, Dict[str, Any]]] = [first]
+    inserted_rows = 0
+
+    async def flush() -> None:
+        nonlocal inserted_rows
+        if not pending:
+            return
+        # product_type 포함 - COPY 컬럼 순서와 동일한 튜플
+        rows = [
+            (
+                product_type,
+                page,
+                max_page_no_col,
+                base_url_str,
+                Jsonb(response["params"]),
+                int(response["http_status"]),
+                Jsonb(response["json"]),
+            )
+            for page, response in pending
+        ]
+        pending.clear()
+        inserted_rows += await asyncio.to_thread(insert_pages, engine, rows)
 
+    if max_page_no:
+        last_page = min(max_page_no, END_PAGE) if END_PAGE else max_page_no
+        _info("[%s] Paging detected: max_page_no=%s", tag, max_page_no)
+        # RAW_BATCH_SIZE 페이지 구간씩 동시 요청 → 구간마다 저장
+        page = first_page + 1
+        while page <= last_page:
+            window_end = min(page + RAW_BATCH_SIZE - len(pending), last_page + 1)
+            pending.extend(await asyncio.gather(*(fetch(p) for p in range(page, window_end))))
+            page = window_end
+            await flush()
+    else:
+        # 메타 없으면 items 비어있는지로 종료
+        page = first_page
+        last_payload = first_payload
+        while not is_empty_page(last_payload):
+            if END_PAGE and page >= END_PAGE:
+                _info("[%s] END_PAGE reached: %s", tag, END_PAGE)
+                break
             page += 1
-            time.sleep(0.2)
+            response = await fetch(page)
+            pending.append(response)
+            last_payload = response[1]["json"]
+            if len(pending) >= RAW_BATCH_SIZE:
+                await flush()
+
+    await flush()
 
-    log.info("[OK] RAW ingest done [%s]. pages inserted=%s", label or top_fin_grp_no, inserted_rows)
+    _info("[OK] RAW ingest done [%s]. pages inserted=%s", tag, inserted_rows)
     return inserted_rows
 
-def main() -> None:
-    engine = get_engine()
+async def main_async(engine: Engine) -> None:
 
     # (product_type, url, top_fin_grp_no)
     combos = [
@@ -200,11 +313,43 @@ def main() -> None:
         ("SAVING",  BASE_URL_SAVING,  "030300"),
     ]
 
-    total = 0
-    for kind, url, grp in combos:
-        total += ingest_one(engine, kind, url, grp, label=f"{kind}/{grp}")
+    # combo들은 서로 독립적인 I/O 스트림 → 동시 수집 (전체 시간 ≈ 가장 느린 combo)
+    # HTTP/2: 하나의 TLS 커넥션 위에서 여러 페이지 요청을 멀티플렉싱 (서버 미지원 시 HTTP/1.1로 협상)
+    # 동시 요청 수/요청 간격 제한은 combo별이 아니라 전체 공통 (API 호출 한도는 키 단위)
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    pacer = Pacer(REQUEST_INTERVAL_MS / 1000)
+    limits = httpx.Limits(max_keepalive_connections=8, max_connections=32)
+    async with httpx.AsyncClient(http2=True, limits=limits) as client:
+        # 한 combo가 실패해도 나머지 combo는 끝까지 수집 (실패는 모두 끝난 뒤 보고)
+        results = await asyncio.gather(*(
+            ingest_one(engine, client, sem, pacer, kind, url, grp, label=f"{kind}/{grp}")
+            for kind, url, grp in combos
+        ), return_exceptions=True)
 
+    failures = [
+        (f"{kind}/{grp}", r)
+        for (kind, _, grp), r in zip(combos, results)
+        if isinstance(r, BaseException)
+    ]
+    for tag, exc in failures:
+        log.error("RAW ingest failed [%s]", tag, exc_info=exc)
+
+    total = sum(r for r in results if not isinstance(r, BaseException))
+    if failures:
+        log.error("RAW ingest finished with %s failed combo(s). total pages inserted=%s", len(failures), total)
+        raise failures[0][1]
     log.info("[OK] All combos done. total pages inserted=%s", total)
 
+def main() -> None:
+    # import 시점에는 DB에 접속하지 않고, 실행 시에만 엔진 생성 + 연결 확인
+    listener = setup_logging()
+    engine = get_engine()
+    try:
+        test_connection(engine)
+        asyncio.run(main_async(engine))
+    finally:
+        engine.dispose()  # 풀에 남은 커넥션을 즉시 반환
+        listener.stop()   # 큐에 남은 로그까지 flush
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
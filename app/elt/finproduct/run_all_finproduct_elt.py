@@ -10,6 +10,8 @@ import sys
 import os
 from datetime import datetime
 
+from dotenv import load_dotenv
+
 STEPS = [
     "01_raw_ingest.py",
     "02_stg_base.py",
@@ -35,6 +37,10 @@ def run_step(script_name: str):
 def main():
     print("💶💶💶 Starting FinProduct ELT Pipeline...")
 
+    # .env는 여기서 한 번만 로드하고, 하위 단계는 상속된 환경변수를 그대로 사용
+    load_dotenv()
+    os.environ["ENV_LOADED"] = "1"
+
     for script in STEPS:
         run_step(script)
 
@@ -13,14 +13,18 @@ raw_ingest.py
   END_PAGE=0           # 선택(0 또는 미지정=모든 페이지)
   HTTP_TIMEOUT=20      # 선택(초)
   RETRY_MAX=5          # 선택(기본 5회)
+  FLUSH_PAGES=50       # 선택(COPY 한 번에 적재/커밋할 페이지 수 = 동시 요청 구간 크기)
+  FETCH_CONCURRENCY=8  # 선택(동시 HTTP 요청 수)
+  REQUEST_INTERVAL_MS=200  # 선택(요청 시작 간 최소 간격, 전체 공통)
   LOG_LEVEL=INFO       # 선택(DEBUG/INFO/WARN/ERROR)
 """
 
 import os
 import math
 import time
+import asyncio
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 import httpx
 import orjson
@@ -57,6 +61,9 @@ START_PAGE = env_int("START_PAGE", 1)
 END_PAGE   = env_int("END_PAGE", 0)  # 0 이면 끝까지
 HTTP_TIMEOUT = env_int("HTTP_TIMEOUT", 20)
 RETRY_MAX    = env_int("RETRY_MAX", 5)
+FLUSH_PAGES  = max(1, env_int("FLUSH_PAGES", 50))
+FETCH_CONCURRENCY   = max(1, env_int("FETCH_CONCURRENCY", 8))
+REQUEST_INTERVAL_MS = env_int("REQUEST_INTERVAL_MS", 200)
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -73,14 +80,29 @@ log = logging.getLogger("raw_ingest")
 class ApiError(Exception):
     pass
 
+class Pacer:
+    """동시 요청 전체에 대해 요청 시작 간격을 interval 이상으로 유지 (과한 요청 방지)"""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
 @retry(
     stop=stop_after_attempt(RETRY_MAX),
     wait=wait_exponential_jitter(initial=0.5, max=5),
     retry=retry_if_exception_type((httpx.HTTPError, ApiError))
 )
-def fetch_page(cli: httpx.Client, page_no: int, page_size: int) -> Dict[str, Any]:
+async def fetch_page(cli: httpx.AsyncClient, pacer: Pacer, page_no: int, page_size: int) -> Dict[str, Any]:
     """
-    페이지 요청.
+    페이지 요청. (재시도 포함 모든 요청이 pacer 간격을 따름)
     - youthcenter API는 page 파라미터 명이 변경될 수 있어, 두 가지를 모두 전달합니다.
     - 서버는 인지 가능한 파라미터 하나만 사용합니다.
     """
@@ -89,7 +111,8 @@ def fetch_page(cli: httpx.Client, page_no: int, page_size: int) -> Dict[str, Any
         "pageNum": page_no,
         "pageSize": page_size,
     }
-    r = cli.get(BASE_URL, params=params, timeout=HTTP_TIMEOUT)
+    await pacer.wait()
+    r = await cli.get(BASE_URL, params=params, timeout=HTTP_TIMEOUT)
     r.raise_for_status()
 
     try:
@@ -132,21 +155,68 @@ def extract_paging_meta(js: Dict[str, Any]) -> tuple[int, int, int]:
 
     return page_num, page_size, tot_page
 
+# -------------------------
+# RAW 적재 (COPY)
+# -------------------------
+# ingest_id / ingested_at 은 컬럼 목록에서 빼서 테이블 기본값 사용
+# text 포맷: 서버가 컬럼 타입에 맞게 파싱 (binary는 int4/int8 등 wire 타입이 정확히 맞아야 함)
+RAW_COPY_SQL = """
+copy raw.youthpolicy_pages
+    (page_no, page_size, base_url, query_params, http_status, payload)
+from stdin
+"""
+
+def flush_pages(conn: psycopg.Connection, rows: List[Tuple[int, int, str, Json, int, Json]]) -> int:
+    """모아둔 페이지를 COPY 한 번으로 적재하고 커밋. 적재한 페이지 수 반환."""
+    if not rows:
+        return 0
+    with conn.cursor() as cur:
+        with cur.copy(RAW_COPY_SQL) as cp:
+            for row in rows:
+                cp.write_row(row)
+    conn.commit()
+    n = len(rows)
+    rows.clear()
+    return n
+
+async def fetch_pages(cli: httpx.AsyncClient, pacer: Pacer, pages: range) -> List[Dict[str, Any]]:
+    """pages 구간을 FETCH_CONCURRENCY 만큼 동시에 요청. 결과는 페이지 순서대로."""
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def one(page_no: int) -> Dict[str, Any]:
+        async with sem:
+            return await fetch_page(cli, pacer, page_no, PAGE_SIZE)
+
+    return await asyncio.gather(*(one(p) for p in pages))
+
 # -------------------------
 # 메인 루프
 # -------------------------
-def main() -> None:
-    log.info("Starting RAW ingest → %s", BASE_URL)
+async def ingest(conn: psycopg.Connection) -> int:
+    """
+    페이지 구간 단위로 동시 요청 → 순서대로 검사 → COPY 적재.
+    - 전체 페이지 수(totPage 또는 END_PAGE)를 알기 전에는 한 페이지씩 요청
+    - 종료 조건에 걸린 페이지 이후의 결과는 버림
+    """
     inserted_rows = 0
+    pacer = Pacer(REQUEST_INTERVAL_MS / 1000)
 
-    with psycopg.connect(PG_DSN, row_factory=tuple_row) as conn:
-        # 트랜잭션: 각 페이지 단위로 커밋(대용량에서도 메모리 안정)
-        with httpx.Client() as cli:
-            page = max(1, START_PAGE)
-            last_page_seen = 0
+    # 트랜잭션: 구간(FLUSH_PAGES 페이지)마다 COPY 후 커밋(대용량에서도 메모리 안정)
+    async with httpx.AsyncClient() as cli:
+        page = max(1, START_PAGE)
+        last_page_seen = 0
+        pending: List[Tuple[int, int, str, Json, int, Json]] = []
+        done = False
 
-            while True:
-                resp = fetch_page(cli, page, PAGE_SIZE)
+        while not done:
+            last = last_page_seen or END_PAGE
+            if END_PAGE:
+                last = min(last, END_PAGE)
+            window_end = max(page, min(page + FLUSH_PAGES - 1, last)) if last else page
+            pages = range(page, window_end + 1)
+            results = await fetch_pages(cli, pacer, pages)
+
+            for page, resp in zip(pages, results):
                 status = resp["http_status"]
                 js = resp["json"]
                 params = resp["params"]
@@ -157,35 +227,20 @@ def main() -> None:
                     last_page_seen = tot_page
                     log.info("Paging detected: total_pages=%s page_size=%s", last_page_seen, page_size)
 
-                # RAW 저장
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        insert into raw.youthpolicy_pages
-                        (page_no, page_size, base_url, query_params, http_status, payload)
-                        values (%s, %s, %s, %s, %s, %s)
-                        """,
-                        (
-                            page,
-                            page_size,
-                            BASE_URL,
-                            Json(params),
-                            status,
-                            Json(js),
-                        )
-                    )
-                conn.commit()
-                inserted_rows += 1
-                log.info("Inserted RAW page: page=%s status=%s", page_num or page, status)
+                # RAW 저장 (구간 끝에서 COPY)
+                pending.append((page, page_size, BASE_URL, Json(params), status, Json(js)))
+                log.info("Fetched RAW page: page=%s status=%s", page_num or page, status)
 
                 # 종료 조건 계산
                 if END_PAGE and page >= END_PAGE:
                     log.info("END_PAGE reached: %s", END_PAGE)
+                    done = True
                     break
 
                 # tot_page 기반 종료
                 if last_page_seen and page >= last_page_seen:
                     log.info("Reached last page: %s", last_page_seen)
+                    done = True
                     break
 
                 # items 길이 기반(메타 없을 때)
@@ -193,12 +248,24 @@ def main() -> None:
                 items = result.get("youthPolicyList", result.get("items", []))
                 if isinstance(items, list) and len(items) == 0:
                     log.info("Empty items; stopping at page=%s", page)
+                    done = True
                     break
 
-                page += 1
-                time.sleep(0.2)  # 과한 요청 방지(레이트리밋 여유)
+            if len(pending) >= FLUSH_PAGES or done:
+                inserted_rows += flush_pages(conn, pending)
+                log.info("Flushed RAW pages: total=%s", inserted_rows)
+
+            page += 1
+
+    return inserted_rows
+
+def main() -> None:
+    log.info("Starting RAW ingest → %s", BASE_URL)
+
+    with psycopg.connect(PG_DSN, row_factory=tuple_row) as conn:
+        inserted_rows = asyncio.run(ingest(conn))
 
     log.info("[OK] RAW ingest done. pages inserted=%s", inserted_rows)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
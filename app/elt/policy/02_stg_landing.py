@@ -9,19 +9,18 @@ ENV (.env 권장):
   PG_DSN=postgresql://<user>:<pass>@<host>:<port>/<db>
   LOOKBACK_HOURS=0           # 0 = 전체 처리, >0 = 최근 N시간 RAW만
   PROCESS_ONLY_UNSEEN=1      # 1 = 이미 처리한 RAW 페이지(ingest_id) 건너뜀
-  BATCH_SIZE=1000
+  BATCH_SIZE=1000            # COPY 한 번(=커밋 1회)에 적재할 최대 정책 수
   LOG_LEVEL=INFO
 """
 
 import os
 import hashlib
 import logging
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 import orjson
 import psycopg
 from psycopg.rows import dict_row
-from psycopg.types.json import Json
 
 try:
     from dotenv import load_dotenv  # optional
@@ -72,7 +71,7 @@ POLICY_NOISE = {
 }
 
 # 해시 계산 시 제외할(휘발 가능) top-level 필드
-DROP_FIELDS = PAGE_META | POLICY_NOISE
+DROP_FIELDS = frozenset(PAGE_META | POLICY_NOISE)
 
 ID_CANDIDATE_KEYS = (
     # 실제 고유키 후보 (서비스에 맞게 우선순위 조정)
@@ -108,25 +107,45 @@ def pick_policy_id(item: Dict[str, Any]) -> str:
     # return make_surrogate_id(item)
     return str(item.get("plcyNo"))
 
-def canonical_bytes(item: Dict[str, Any]) -> bytes:
-    """DROP_FIELDS 제거 후 key-sort하여 안정적 JSON 바이트 생성."""
-    pruned = {k: v for k, v in item.items() if k not in DROP_FIELDS}
-    return orjson.dumps(pruned, option=orjson.OPT_SORT_KEYS)
+# 해시용 JSON: DROP_FIELDS 제거 후 key 정렬로 안정적인 바이트 (upsert_landing 루프에서 사용)
+CANONICAL_OPT = orjson.OPT_SORT_KEYS
 
-def record_hash(item: Dict[str, Any]) -> str:
-    return hashlib.sha256(canonical_bytes(item)).hexdigest()
-
-def chunked(it: Iterable, size: int) -> Iterable[List]:
-    buf: List = []
-    for x in it:
-        buf.append(x)
-        if len(buf) >= size:
-            yield buf
-            buf = []
-    if buf:
-        yield buf
+# 정책 수만큼 호출되므로 모듈 속성 조회를 한 번만
+_sha256 = hashlib.sha256
 
 # ---------- Core ----------
+# 임시 테이블에 COPY 후 한 번에 insert ... select (중복은 on conflict do nothing)
+# - 컬럼 타입은 landing 테이블에서 그대로 가져옴
+LANDING_TMP_CREATE_SQL = """
+create temporary table tmp_landing on commit drop as
+select policy_id, record_hash, raw_json, raw_ingest_id, page_no
+  from stg.youthpolicy_landing
+  with no data
+"""
+LANDING_TMP_COPY_SQL = """
+copy tmp_landing (policy_id, record_hash, raw_json, raw_ingest_id, page_no) from stdin
+"""
+LANDING_INSERT_SQL = """
+insert into stg.youthpolicy_landing
+    (policy_id, record_hash, raw_json, raw_ingest_id, page_no)
+select policy_id, record_hash, raw_json, raw_ingest_id, page_no
+  from tmp_landing
+on conflict do nothing
+"""
+
+def flush_landing(conn: psycopg.Connection, rows: List[Tuple[str, str, str, str, int]]) -> None:
+    """모아둔 정책 row를 COPY → landing insert 후 커밋."""
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        cur.execute(LANDING_TMP_CREATE_SQL)
+        with cur.copy(LANDING_TMP_COPY_SQL) as cp:
+            for row in rows:
+                cp.write_row(row)
+        cur.execute(LANDING_INSERT_SQL)
+    conn.commit()
+    rows.clear()
+
 def load_raw_pages(conn: psycopg.Connection) -> List[Dict[str, Any]]:
     """처리할 RAW 페이지들을 로드."""
     with conn.cursor(row_factory=dict_row) as cur:
@@ -181,37 +200,43 @@ def upsert_landing(conn: psycopg.Connection, pages: List[Dict[str, Any]]) -> Non
     total_items = 0
     surrogate_used = 0
 
-    with conn.cursor() as cur:
-        for r in pages:
-            ingest_id = r["ingest_id"]
-            page_no = int(r["page_no"])
-            payload = r["payload"]
-
-            items = extract_items_from_payload(payload)
-            if not items:
-                continue
-
-            prepared: List[Tuple[str, str, Json, str, int]] = []
-            for it in items:
-                pid = pick_policy_id(it)
-                if pid.startswith("SURR::"):
-                    surrogate_used += 1
-                h = record_hash(it)
-                prepared.append((pid, h, Json(it), str(ingest_id), page_no))
-
-            total_items += len(prepared)
-
-            for batch in chunked(prepared, BATCH_SIZE):
-                cur.executemany(
-                    """
-                    insert into stg.youthpolicy_landing
-                        (policy_id, record_hash, raw_json, raw_ingest_id, page_no)
-                    values (%s, %s, %s, %s, %s)
-                    on conflict do nothing
-                    """,
-                    batch,
-                )
-            conn.commit()
+    # 페이지 단위가 아니라 BATCH_SIZE 정책 단위로 모아서 적재
+    # (한 페이지의 정책은 항상 같은 트랜잭션에 들어감 → PROCESS_ONLY_UNSEEN 판단 안전)
+    # raw_json은 orjson으로 미리 직렬화한 JSON 텍스트 (text COPY에서 jsonb로 파싱)
+    prepared: List[Tuple[str, str, str, str, int]] = []
+    # 정책마다 id → 해시 → raw_json 을 한 루프에서 (지역 변수로 조회 비용 절감)
+    # - 해시: 있는 DROP 필드만 복사본에서 지우고 key 정렬 직렬화 (원본 item은 raw_json으로 그대로 저장)
+    dumps, sha256, opt, drop_fields = orjson.dumps, _sha256, CANONICAL_OPT, DROP_FIELDS
+    append = prepared.append
+    for r in pages:
+        ingest_id = r["ingest_id"]
+        page_no = int(r["page_no"])
+        payload = r["payload"]
+
+        items = extract_items_from_payload(payload)
+        if not items:
+            continue
+
+        ingest_id_str = str(ingest_id)
+        for it in items:
+            pid = pick_policy_id(it)
+            if pid.startswith("SURR::"):
+                surrogate_used += 1
+            drop = drop_fields & it.keys()
+            if drop:
+                pruned = dict(it)
+                for k in drop:
+                    del pruned[k]
+            else:
+                pruned = it
+            append((pid, sha256(dumps(pruned, option=opt)).hexdigest(), dumps(it).decode(), ingest_id_str, page_no))
+
+        total_items += len(items)
+
+        if len(prepared) >= BATCH_SIZE:
+            flush_landing(conn, prepared)
+
+    flush_landing(conn, prepared)
 
     log.info("Landing upsert complete. items=%s, surrogate_used=%s", total_items, surrogate_used)
 
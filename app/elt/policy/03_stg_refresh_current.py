@@ -52,7 +52,13 @@ def refresh_current(conn: psycopg.Connection) -> None:
     if LOOKBACK_HOURS > 0:
         cutoff_ts = datetime.now(timezone.utc) - timedelta(hours=LOOKBACK_HOURS)
 
-    with conn.cursor(row_factory=dict_row) as cur:
+    # pipeline: 아래 문장들을 왕복 대기 없이 연달아 보내고, 집계 결과는 마지막에 읽음
+    # - 조회용 cursor를 따로 두어 중간 fetch로 파이프라인이 끊기지 않게 함
+    with conn.pipeline(), \
+         conn.cursor(row_factory=dict_row) as cur, \
+         conn.cursor(row_factory=dict_row) as diff_cur, \
+         conn.cursor(row_factory=dict_row) as seen_cur, \
+         conn.cursor(row_factory=dict_row) as total_cur:
         # 1) 최신 후보 집합(tmp_latest) 구성
         if cutoff_ts is not None:
             cur.execute("""
@@ -81,14 +87,12 @@ def refresh_current(conn: psycopg.Connection) -> None:
         """)
 
         # 3) 변경 건수 확인(디버깅용)
-        cur.execute("""
+        diff_cur.execute("""
             select count(*) as diff_count
             from tmp_latest tl
             join stg.youthpolicy_current c on c.policy_id = tl.policy_id
             where c.record_hash <> tl.record_hash;
         """)
-        diff_count = cur.fetchone()["diff_count"]
-        log.info("Diff (hash changed) in window: %s", diff_count)
 
         # 4) upsert 적용: 최신 해시 반영 + last_seen_at 갱신 + first_seen_at 최소값 유지
         cur.execute("""
@@ -123,10 +127,13 @@ def refresh_current(conn: psycopg.Connection) -> None:
             """, (inactive_cutoff,))
 
         # 6) 현황 로그
-        cur.execute("select count(*) as seen_policies from tmp_latest;")
-        seen_cnt = cur.fetchone()["seen_policies"]
-        cur.execute("select count(*) as current_rows from stg.youthpolicy_current;")
-        cur_cnt = cur.fetchone()["current_rows"]
+        seen_cur.execute("select count(*) as seen_policies from tmp_latest;")
+        total_cur.execute("select count(*) as current_rows from stg.youthpolicy_current;")
+
+        diff_count = diff_cur.fetchone()["diff_count"]
+        log.info("Diff (hash changed) in window: %s", diff_count)
+        seen_cnt = seen_cur.fetchone()["seen_policies"]
+        cur_cnt = total_cur.fetchone()["current_rows"]
 
     conn.commit()
     log.info("Upsert applied. seen_in_window=%s, current_total=%s, inactive_threshold=%sd",
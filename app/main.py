@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from app.routers import health
 from app.core.cors import setup_cors
+from app.core.db import setup_db_session
 
 # Policy
 from app.routers.policy import filter as policy_filter
@@ -56,6 +57,7 @@ def create_app() -> FastAPI:
     )
 
     setup_cors(app)
+    setup_db_session(app)
     
     # Health
     app.include_router(health.router, prefix="/api")
@@ -0,0 +1,101 @@
+"""
+finproduct ELT(04_stg_to_core) 테스트
+- 타입별 업서트 SQL 구문 확인 (DB가 있으면 실제 실행 후 롤백)
+"""
+import importlib.util
+import os
+import re
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+STG_TO_CORE_PATH = Path(__file__).resolve().parents[1] / "app" / "elt" / "finproduct" / "04_stg_to_core.py"
+
+# 실제 실행 테스트용 DB (없으면 해당 테스트만 skip)
+TEST_PG_DSN_FIN = os.getenv("TEST_PG_DSN_FIN")
+
+
+@pytest.fixture(scope="module")
+def stg_to_core():
+    """04_stg_to_core 모듈 로드 (파일명이 숫자로 시작해 importlib 사용, Gemini 비활성)"""
+    pytest.importorskip("tqdm")
+    mp = pytest.MonkeyPatch()
+    mp.setenv("PG_DSN_FIN", TEST_PG_DSN_FIN or "postgresql+psycopg://u:p@localhost/db")
+    mp.setenv("GEMINI_API_KEY", "")
+    spec = importlib.util.spec_from_file_location("stg_to_core", STG_TO_CORE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    mp.setitem(sys.modules, spec.name, module)  # dataclass 정의 시 모듈 조회 필요
+    spec.loader.exec_module(module)
+    yield module
+    mp.undo()
+
+
+class TestUpsertStatements:
+    """타입별 업서트 SQL (UPSERT_STATEMENTS)"""
+
+    def test_no_dangling_comma_after_last_cte(self, stg_to_core):
+        """마지막 CTE 뒤에 쉼표가 남아 본문 문장과 이어지지 않아야 함"""
+        for sql in stg_to_core.UPSERT_STATEMENTS:
+            body = re.sub(r"--[^\n]*", "", sql)
+            assert not re.search(r"\)\s*,\s*(INSERT|UPDATE|DELETE|SELECT)\b", body, re.IGNORECASE), sql
+
+    def test_statements_compile_with_product_type_only(self, stg_to_core):
+        """모든 문장이 컴파일되고, 바인드 파라미터는 :product_type 뿐이어야 함"""
+        dialect = postgresql.dialect()
+        for sql in stg_to_core.UPSERT_STATEMENTS:
+            compiled = text(sql).compile(dialect=dialect)
+            assert set(compiled.params) <= {"product_type"}, sql
+
+    @pytest.mark.skipif(not TEST_PG_DSN_FIN, reason="TEST_PG_DSN_FIN 미설정")
+    @pytest.mark.parametrize("product_type", ["DEPOSIT", "SAVING"])
+    def test_statements_execute(self, stg_to_core, product_type):
+        """실제 DB에서 파이프라인으로 실행 (결과는 롤백)"""
+        engine = create_engine(TEST_PG_DSN_FIN, future=True)
+        try:
+            stg_to_core.bootstrap(engine)
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    counts = stg_to_core.run_pipelined(
+                        conn, stg_to_core.UPSERT_STATEMENTS, {"product_type": product_type}
+                    )
+                    assert len(counts) == len(stg_to_core.UPSERT_STATEMENTS)
+                finally:
+                    trans.rollback()
+        finally:
+            engine.dispose()
+
+
+def instruction_examples(instruction: str):
+    """카테고리 정의 줄('N. field: 설명 (예1, 예2, ... 등)')에서 (field, 예시 키워드) 목록 추출"""
+    for m in re.finditer(r"^\d+\.\s*(\w+):.*\((.+)\)\s*$", instruction, re.MULTILINE):
+        for term in m.group(2).split(","):
+            term = re.sub(r"\s*등$", "", term.strip())
+            if term:
+                yield m.group(1), term
+
+
+class TestKeywordClassification:
+    """키워드 사전 분류가 Gemini 카테고리 정의와 같은 결과를 내는지"""
+
+    def test_every_instruction_example_sets_its_category(self, stg_to_core):
+        """카테고리 정의의 예시 키워드는 키워드 분류에서도 해당 카테고리로 잡혀야 함"""
+        examples = list(instruction_examples(stg_to_core.SPECIAL_CONDITION_INSTRUCTION))
+        assert {field for field, _ in examples} == set(stg_to_core.KEYWORDS)
+        for field, term in examples:
+            condition, confidence = stg_to_core.classify_by_keywords(term)
+            assert getattr(condition, field), (field, term)
+            assert confidence == 1.0
+
+    @pytest.mark.parametrize("clause, expected", [
+        ("모바일뱅킹 가입", {"is_non_face_to_face", "is_bank_app"}),
+        ("공과금 자동이체", {"is_utility_linked", "is_auto_transfer"}),
+        ("급여이체 실적", {"is_salary_linked"}),
+    ])
+    def test_overlapping_keywords_set_every_category(self, stg_to_core, clause, expected):
+        """여러 카테고리에 걸치는 문구는 해당 카테고리를 모두 true로"""
+        condition, _ = stg_to_core.classify_by_keywords(clause)
+        assert {name for name in stg_to_core.KEYWORDS if getattr(condition, name)} == expected
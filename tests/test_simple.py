@@ -150,5 +150,30 @@ class TestCORS:
         assert "content-type" in response.headers
 
 
+class TestDBSessionScope:
+    """요청 단위 세션 재사용 테스트 (세션 생성만 하고 DB 접속은 하지 않음)"""
+
+    def test_same_session_within_request(self):
+        """같은 요청 안의 get_db 의존성은 (FastAPI 의존성 캐시 없이도) 하나의 세션을 공유"""
+        from fastapi import Depends
+        from app.core.db import get_db
+
+        app = create_app()
+        seen = []
+
+        @app.get("/_test/session")
+        async def _session_route(a=Depends(get_db), b=Depends(get_db, use_cache=False)):
+            seen.append((a, b))
+            return {"same": a is b}
+
+        with TestClient(app) as client:
+            first = client.get("/_test/session")
+            client.get("/_test/session")
+
+        assert first.json() == {"same": True}
+        # 요청이 다르면 세션도 다름
+        assert seen[0][0] is not seen[1][0]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file